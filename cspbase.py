@@ -45,7 +45,7 @@ class Variable:
 
        The variable object offers two types of functionality to support
        search. 
-       (a) It has a current domain, implimented as a set of flags 
+       (a) It has a current domain, implimented as a bitmask of flags
            determining which domain values are "current", i.e., unpruned.
            - you can prune a value, and restore it.
            - you can obtain a list of values in the current domain, or count
@@ -81,16 +81,18 @@ class Variable:
         '''
         self.name = name                #text name for variable
         self.dom = list(domain)         #Make a copy of passed domain
-        self.curdom = [True] * len(domain)      #using list
+        #current domain as a bitmask: bit i set ==> dom[i] is unpruned.
+        #indexing by domain position keeps this valid for any value type
+        self.curdom_mask = (1 << len(domain)) - 1
         #for bt_search
         self.assignedValue = None
 
     def add_domain_values(self, values):
         '''Add additional domain values to the domain
            Removals not supported removals'''
-        for val in values: 
+        for val in values:
             self.dom.append(val)
-            self.curdom.append(True)
+            self.curdom_mask |= 1 << (len(self.dom) - 1)
 
     def domain_size(self):
         '''Return the size of the (permanent) domain'''
@@ -106,46 +108,46 @@ class Variable:
 
     def prune_value(self, value):
         '''Remove value from CURRENT domain'''
-        self.curdom[self.value_index(value)] = False
+        self.curdom_mask &= ~(1 << self.value_index(value))
 
     def unprune_value(self, value):
         '''Restore value to CURRENT domain'''
-        self.curdom[self.value_index(value)] = True
+        self.curdom_mask |= 1 << self.value_index(value)
 
     def cur_domain(self):
-        '''return list of values in CURRENT domain (if assigned 
+        '''return list of values in CURRENT domain (if assigned
            only assigned value is viewed as being in current domain)'''
         vals = []
         if self.is_assigned():
             vals.append(self.get_assigned_value())
         else:
+            mask = self.curdom_mask
             for i, val in enumerate(self.dom):
-                if self.curdom[i]:
+                if (mask >> i) & 1:
                     vals.append(val)
         return vals
 
     def in_cur_domain(self, value):
         '''check if value is in CURRENT domain (without constructing list)
-           if assigned only assigned value is viewed as being in current 
+           if assigned only assigned value is viewed as being in current
            domain'''
         if not value in self.dom:
             return False
         if self.is_assigned():
             return value == self.get_assigned_value()
         else:
-            return self.curdom[self.value_index(value)]
+            return bool((self.curdom_mask >> self.value_index(value)) & 1)
 
     def cur_domain_size(self):
         '''Return the size of the variables domain (without construcing list)'''
         if self.is_assigned():
             return 1
         else:
-            return(sum(1 for v in self.curdom if v))
+            return bin(self.curdom_mask).count('1')
 
     def restore_curdom(self):
         '''return all values back into CURRENT domain'''
-        for i in range(len(self.curdom)):
-            self.curdom[i] = True
+        self.curdom_mask = (1 << len(self.dom)) - 1
 
     #
     #methods for assigning and unassigning
@@ -194,9 +196,10 @@ class Variable:
 
     def print_all(self):
         '''Also print the variable domain and current domain'''
-        print("Var--\"{}\": Dom = {}, CurDom = {}".format(self.name, 
-                                                             self.dom, 
-                                                             self.curdom))
+        curdom = [bool((self.curdom_mask >> i) & 1) for i in range(len(self.dom))]
+        print("Var--\"{}\": Dom = {}, CurDom = {}".format(self.name,
+                                                             self.dom,
+                                                             curdom))
 class Constraint: 
     '''Class for defining constraints variable objects specifes an
        ordering over variables.  This ordering is used when calling
@@ -224,11 +227,16 @@ class Constraint:
         self.sat_tuples = dict()
 
         #The next object data item 'sup_tuples' will be used to help
-        #support GAC propgation. It allows access to a list of 
+        #support GAC propgation. It allows access to a list of
         #satisfying tuples that contain a particular variable/value
         #pair.
         self.sup_tuples = dict()
 
+        #for binary constraints, 'sup_masks' maps (scope position, value)
+        #to a bitmask over the partner variable's domain indices of the
+        #values that support it. Built lazily by support_mask.
+        self.sup_masks = None
+
     def add_satisfying_tuples(self, tuples):
         '''We specify the constraint by adding its complete list of satisfying tuples.'''
         for x in tuples:
@@ -243,6 +251,8 @@ class Constraint:
                     self.sup_tuples[(var,val)] = []
                 self.sup_tuples[(var,val)].append(t)
 
+        self.sup_masks = None  #invalidate any lazily built support masks
+
     def get_scope(self):
         '''get list of variables the constraint is over'''
         return list(self.scope)
@@ -284,6 +294,23 @@ class Constraint:
                     return True
         return False
 
+    def support_mask(self, var, val):
+        '''For a BINARY constraint, return a bitmask over the partner
+           variable's domain indices of the values that together with
+           var=val satisfy the constraint. Support for var=val can then
+           be tested by ANDing against the partner's current domain mask.
+           The table is built lazily on first use.'''
+        if self.sup_masks is None:
+            self.sup_masks = dict()
+            x, y = self.scope
+            for (vx, vy) in self.sat_tuples:
+                self.sup_masks[(0, vx)] = (self.sup_masks.get((0, vx), 0)
+                                           | (1 << y.value_index(vy)))
+                self.sup_masks[(1, vy)] = (self.sup_masks.get((1, vy), 0)
+                                           | (1 << x.value_index(vx)))
+        pos = 0 if self.scope[0] is var else 1
+        return self.sup_masks.get((pos, val), 0)
+
     def tuple_is_valid(self, t):
         '''Internal routine. Check if every value in tuple is still in
            corresponding variable domains'''
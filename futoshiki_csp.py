@@ -23,7 +23,57 @@ cell of the Futoshiki puzzle.
 
 '''
 from cspbase import *
-import itertools 
+import functools
+import itertools
+import math
+
+# numba gives a near-native all-different tuple generator, but the solver
+# has to keep working on a plain Python install, so it stays optional
+try:
+    import numpy as np
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _gen_perm_rows(n, out):
+        '''Fill out (an n! x n int8 array) with every permutation of the
+        indices 0..n-1, enumerated with an explicit choice stack and a
+        visited bitmask instead of recursion. Returns the row count.'''
+        perm = np.zeros(n, dtype=np.int8)
+        next_try = np.zeros(n, dtype=np.int8) # value to resume from at each depth
+        used = 0
+        depth = 0
+        count = 0
+
+        while depth >= 0:
+            v = next_try[depth]
+            while v < n and (used >> v) & 1:
+                v += 1
+
+            if v >= n: # choices exhausted at this depth, backtrack
+                next_try[depth] = 0
+                depth -= 1
+                if depth >= 0:
+                    used &= ~(1 << int(perm[depth]))
+            else:
+                perm[depth] = v
+                next_try[depth] = v + 1
+                if depth == n - 1:
+                    out[count] = perm
+                    count += 1
+                else:
+                    used |= 1 << v
+                    depth += 1
+
+        return count
+
+    def _all_perm_rows(n):
+        out = np.empty((math.factorial(n), n), dtype=np.int8)
+        _gen_perm_rows(n, out)
+        return out
 
 def futoshiki_csp_model_1(futo_grid):    
     n = len(futo_grid)
@@ -36,24 +86,29 @@ def futoshiki_csp_model_1(futo_grid):
     for i in range(0, n):
         var_domain.append(i + 1);
         variables.append([])
-        
+
+    # the !=, < and > satisfying tuples are identical for every pair of
+    # cells with full domains, so build each table once and share it
+    neq_tuples, lt_tuples, gt_tuples = shared_tuple_tables(n)
+    cell_domains = reduced_cell_domains(futo_grid, var_domain)
+
     for row in range(n):
         for col in range(num_col):
             if col % 2 == 0: # this is a var
-                var = var_setup(futo_grid = futo_grid, var_domain = var_domain, row = row, col = col)
+                var = var_setup(futo_grid = futo_grid, var_domain = cell_domains[row][int(col/2)], row = row, col = col)
                 variables[row].append(var)
                 csp.add_var(var)
             elif (col > 0 and (futo_grid[row][col - 1] == '<' or futo_grid[row][col - 1] == '>')):
                 # add constraint btwn the curr var and the previous var
-                ineq_constraint(csp = csp, futo_grid = futo_grid, variables = variables, var1 = variables[row][int(col/2) - 1], var2 = variables[row][int(col/2)], greater_than = (futo_grid[row][col - 1] == '>'), row = row, col = col)
-    
-    # # create row constraints
+                ineq_constraint(csp = csp, futo_grid = futo_grid, variables = variables, var1 = variables[row][int(col/2) - 1], var2 = variables[row][int(col/2)], greater_than = (futo_grid[row][col - 1] == '>'), row = row, col = col, table = gt_tuples if futo_grid[row][col - 1] == '>' else lt_tuples)
+
+    # # create row and column constraints
     for i in range(n): #each row
         for j in range(n):
             for k in range(j+1, n):
-                binary_constraint(csp = csp, variables = variables, row_constraint = True, row = i, col1 = j, col2 = k, col = i, row1 = j, row2 = k)
-                binary_constraint(csp = csp, variables = variables, row_constraint = False, row = i, col1 = j, col2 = k, col = i, row1 = j, row2 = k)
-                                
+                _row_neq(csp, variables, neq_tuples, i, j, k)
+                _col_neq(csp, variables, neq_tuples, i, j, k)
+
     return (csp, variables)
     
 def futoshiki_csp_model_2(futo_grid):
@@ -69,17 +124,20 @@ def futoshiki_csp_model_2(futo_grid):
         var_domain.append(i + 1);
         variables.append([])
         row_domains.append([])
-    
+
+    _, lt_tuples, gt_tuples = shared_tuple_tables(n)
+    cell_domains = reduced_cell_domains(futo_grid, var_domain)
+
     for row in range(n):
         for col in range(num_col):
             if col % 2 == 0: # this is a var
-                var = var_setup(futo_grid = futo_grid, var_domain = var_domain, row = row, col = col)
+                var = var_setup(futo_grid = futo_grid, var_domain = cell_domains[row][int(col/2)], row = row, col = col)
                 variables[row].append(var)
                 row_domains[row].append(var.cur_domain())
                 csp.add_var(var)
             elif (col > 0 and (futo_grid[row][col - 1] == '<' or futo_grid[row][col - 1] == '>')):
                 # add constraint btwn the curr var and the previous var
-                ineq_constraint(csp=csp, futo_grid = futo_grid, variables = variables, var1 = variables[row][int(col/2) - 1], var2 = variables[row][int(col/2)], greater_than = (futo_grid[row][col - 1] == '>'), row = row, col = col)
+                ineq_constraint(csp=csp, futo_grid = futo_grid, variables = variables, var1 = variables[row][int(col/2) - 1], var2 = variables[row][int(col/2)], greater_than = (futo_grid[row][col - 1] == '>'), row = row, col = col, table = gt_tuples if futo_grid[row][col - 1] == '>' else lt_tuples)
                 
     for i in range(n):
         col_vars = []
@@ -94,26 +152,96 @@ def futoshiki_csp_model_2(futo_grid):
         
     return (csp, variables)
 
+@functools.lru_cache(maxsize=None)
+def all_diff_tuples(n):
+    '''Every permutation of 1..n, shared by all row/column all-different
+    constraints whose cells carry the full domain. Memoized per n.'''
+    if NUMBA_AVAILABLE:
+        return tuple(tuple(int(i) + 1 for i in row) for row in _all_perm_rows(n))
+    return tuple(itertools.permutations(range(1, n + 1)))
+
 def all_diff_constraint(csp, vars, domains, num_vars):
     con = Constraint("{})".format(":("), vars)
+
+    if all(len(d) == num_vars for d in domains):
+        # no cell is pre-assigned, so every permutation of 1..n satisfies
+        # the constraint - reuse the one shared list instead of rebuilding
+        # it for each of the 2n rows and columns
+        con.add_satisfying_tuples(all_diff_tuples(num_vars))
+        csp.add_constraint(con)
+        return
+
     sat_tuples = []
-    every_tuple = [[]]
-    
-    for pool in domains:
-        every_tuple = [x+[y] for x in every_tuple for y in pool]
-    
-    for possible_tuple in every_tuple:
-        valid = True
-        for i in range(num_vars):
-            for j in range(i+1, num_vars):
-                if possible_tuple[i] == possible_tuple[j]:
-                    valid = False
-        if valid:
-            sat_tuples.append(possible_tuple)
+
+    # enumerate permutations of the union of the domains (n! tuples) instead
+    # of the full cartesian product (n^n tuples) - valid all-diff tuples are
+    # exactly the permutations whose values fall in each var's domain
+    union_domain = set().union(*domains)
+    domain_sets = [set(d) for d in domains]
+
+    if NUMBA_AVAILABLE and len(union_domain) == num_vars:
+        # jitted generator enumerates index permutations in native code;
+        # map indices back through the sorted union values
+        values = sorted(union_domain)
+        for row in _all_perm_rows(num_vars):
+            perm = tuple(values[i] for i in row)
+            if all(val in dset for val, dset in zip(perm, domain_sets)):
+                sat_tuples.append(perm)
+    else:
+        for perm in itertools.permutations(union_domain, num_vars):
+            if all(val in dset for val, dset in zip(perm, domain_sets)):
+                sat_tuples.append(perm)
 
     con.add_satisfying_tuples(sat_tuples)
     csp.add_constraint(con)
     
+@functools.lru_cache(maxsize=None)
+def shared_tuple_tables(n):
+    '''Build the !=, < and > satisfying-tuple tables for the full domain
+    1..n once, so every pair constraint over full-domain cells can share
+    them. Board sizes are small and fixed, so the tables are memoized
+    per n across model builds.'''
+    var_domain = range(1, n + 1)
+    neq_tuples = []
+    lt_tuples = []
+    gt_tuples = []
+
+    for val1 in var_domain:
+        for val2 in var_domain:
+            if val1 < val2:
+                lt_tuples.append((val1, val2))
+                neq_tuples.append((val1, val2))
+            elif val1 > val2:
+                gt_tuples.append((val1, val2))
+                neq_tuples.append((val1, val2))
+
+    # freeze the cached payloads - they are shared across constraints and
+    # across model builds, so nothing should be able to mutate them
+    return tuple(neq_tuples), tuple(lt_tuples), tuple(gt_tuples)
+
+def reduced_cell_domains(futo_grid, var_domain):
+    '''Unary preprocessing on the pre-assigned cells: a given's value can
+    never appear elsewhere in its row or column, so drop it from the
+    initial domains of those peers. Every constraint built afterwards
+    then enumerates smaller domains. Returns an n x n list of domains.'''
+    n = len(futo_grid)
+    givens = [[futo_grid[row][col] for col in range(0, len(futo_grid[0]), 2)]
+              for row in range(n)]
+
+    cell_domains = []
+    for row in range(n):
+        row_domains = []
+        for col in range(n):
+            if givens[row][col] != 0:
+                row_domains.append([givens[row][col]])
+            else:
+                taken = {givens[row][k] for k in range(n)}
+                taken |= {givens[k][col] for k in range(n)}
+                row_domains.append([val for val in var_domain if val not in taken])
+        cell_domains.append(row_domains)
+
+    return cell_domains
+
 def var_setup(futo_grid, var_domain, row, col):
     var_name = "V{}{}".format(row, int(col/2))
     
@@ -124,32 +252,43 @@ def var_setup(futo_grid, var_domain, row, col):
 
     return var
 
-def ineq_constraint(csp, futo_grid, variables, var1, var2, greater_than, row, col):   
+def ineq_constraint(csp, futo_grid, variables, var1, var2, greater_than, row, col, table=None):
     con = Constraint("C {}{}{}{}{}".format(row,int(col/2)-1,futo_grid[row][col-1],row,int(col/2)),[var1, var2])
-    sat_tuples = []
-    
-    for val1 in var1.cur_domain():
-        for val2 in var2.cur_domain():
-            if ((greater_than and val1 > val2) or (not greater_than and val1 < val2)):
-                sat_tuples.append((val1, val2))
+    n = len(futo_grid)
+
+    if table is not None and var1.domain_size() == n and var2.domain_size() == n:
+        # both cells carry the full domain, so the shared table applies as is
+        sat_tuples = table
+    else:
+        # hoist the direction test out of the pair loop
+        pairs = itertools.product(var1.cur_domain(), var2.cur_domain())
+        if greater_than:
+            sat_tuples = [(val1, val2) for val1, val2 in pairs if val1 > val2]
+        else:
+            sat_tuples = [(val1, val2) for val1, val2 in pairs if val1 < val2]
+
     con.add_satisfying_tuples(sat_tuples)
     csp.add_constraint(con)
 
-def binary_constraint(csp, variables, row_constraint, row, col1, col2, col, row1, row2):
-    if row_constraint:
-        var1 = variables[row][col1]
-        var2 = variables[row][col2]
-        con = Constraint("C {}{}!={}{}".format(row,col1,row,col2), [var1, var2])
+def _row_neq(csp, variables, table, row, col1, col2):
+    _neq_pair(csp, variables[row][col1], variables[row][col2],
+              "C {}{}!={}{}".format(row, col1, row, col2), table, len(variables))
+
+def _col_neq(csp, variables, table, col, row1, row2):
+    _neq_pair(csp, variables[row1][col], variables[row2][col],
+              "C {}{}!={}{}".format(row1, col, row2, col), table, len(variables))
+
+def _neq_pair(csp, var1, var2, name, table, n):
+    con = Constraint(name, [var1, var2])
+
+    if var1.domain_size() == n and var2.domain_size() == n:
+        # both cells carry the full domain, so the shared table applies as is
+        sat_tuples = table
     else:
-        var1 = variables[row1][col]
-        var2 = variables[row2][col] 
-        con = Constraint("C {}{}!={}{}".format(row1,col,row2, col), [var1, var2])
-        
-    sat_tuples = []
-    for val1 in var1.cur_domain():
-        for val2 in var2.cur_domain():
+        sat_tuples = []
+        for val1, val2 in itertools.product(var1.cur_domain(), var2.cur_domain()):
             if (val1 != val2):
                 sat_tuples.append((val1, val2))
-                
+
     con.add_satisfying_tuples(sat_tuples)
     csp.add_constraint(con)
\ No newline at end of file
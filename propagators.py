@@ -69,7 +69,7 @@ var_ordering == a function with the following template
     of the heuristic it implements.
    '''
 
-import math
+from collections import deque
 
 def prop_BT(csp, newVar=None):
     '''Do plain backtracking propagation. That is, do no 
@@ -93,19 +93,49 @@ def prop_FC(csp, newVar=None):
        track of all pruned variable,value pairs and return '''
         
     pruned = []
-    
-    for c in csp.get_all_cons() if not newVar else csp.get_cons_with_var(newVar):
+    pruned_append = pruned.append # hoist bound methods out of the hot loops
+
+    # read the stored adjacency directly: get_cons_with_var copies its list
+    # on every call and this runs at every search node. get_all_cons already
+    # returns the stored constraint list. Both are only iterated here.
+    for c in csp.get_all_cons() if not newVar else csp.vars_to_cons[newVar]:
         if c.get_n_unasgn() == 1: # only one unassigned variable
-            for var in c.get_scope(): # vars in the scope of the constraint
-                if not var.is_assigned(): # find the one that is not assigned             
-                    
-                    for value in var.cur_domain(): #  check that every var in the domain of unassigned_var has support
-                        if not c.has_support(var, value): 
-                            var.prune_value(value)
-                            pruned.append((var, value))
-            
-                    if len(var.cur_domain()) == 0:
-                        return False, pruned
+            scope = c.get_scope()
+            for var in scope: # find the one that is not assigned
+                if not var.is_assigned():
+                    break
+
+            # hoist the domain list and track the remaining count
+            # locally rather than rebuilding cur_domain() per check
+            dom = var.cur_domain()
+            remaining = len(dom)
+
+            prune_value = var.prune_value
+
+            if len(scope) == 2:
+                # binary constraint: the support test reduces to one AND of
+                # the precomputed support mask against the assigned
+                # partner's singleton mask
+                other = scope[0] if scope[1] is var else scope[1]
+                other_mask = 1 << other.value_index(other.get_assigned_value())
+                support_mask = c.support_mask
+
+                for value in dom:
+                    if not (support_mask(var, value) & other_mask):
+                        prune_value(value)
+                        pruned_append((var, value))
+                        remaining -= 1
+            else:
+                has_support = c.has_support
+
+                for value in dom: #  check that every value in the domain of unassigned_var has support
+                    if not has_support(var, value):
+                        prune_value(value)
+                        pruned_append((var, value))
+                        remaining -= 1
+
+            if remaining == 0:
+                return False, pruned
     
     return True, pruned
 
@@ -116,42 +146,64 @@ def prop_GAC(csp, newVar=None):
     #IMPLEMENT
     
     pruned = []
-    constraint_queue = csp.get_all_cons() if not newVar else csp.get_cons_with_var(newVar)
-    
-    for constraint in constraint_queue:
+    pruned_append = pruned.append # hoist bound methods out of the hot loops
+    # explicit popleft processing keeps the worklist bounded by the number
+    # of constraints; the companion set of queue members ensures a
+    # constraint is never enqueued twice
+    # seed from the stored constraint/adjacency lists rather than the
+    # copying accessors; the deque makes its own copy
+    constraint_queue = deque(csp.get_all_cons() if not newVar else csp.vars_to_cons[newVar])
+    in_queue = {id(c) for c in constraint_queue}
+
+    while constraint_queue:
+        constraint = constraint_queue.popleft()
+        in_queue.discard(id(constraint))
+
         for var in constraint.get_unasgn_vars(): # get unassigned vars in constraint
             pruned_from = False
-    
-            # now check that every var in the domain of unassigned_var has support
-            for val in var.cur_domain():
-                if not constraint.has_support(var, val):
-                    var.prune_value(val)
-                    pruned.append((var, val))
+
+            # hoist the domain list and track the remaining count locally
+            # rather than rebuilding cur_domain() per check
+            dom = var.cur_domain()
+            remaining = len(dom)
+
+            has_support = constraint.has_support
+            prune_value = var.prune_value
+
+            # now check that every value in the domain of unassigned_var has support
+            for val in dom:
+                if not has_support(var, val):
+                    prune_value(val)
+                    pruned_append((var, val))
                     pruned_from = True
-    
-            if len(var.cur_domain()) == 0: # domain wipe out
+                    remaining -= 1
+
+            if remaining == 0: # domain wipe out
                 return False, pruned
-            
+
             if pruned_from:
-                for cons in csp.get_cons_with_var(var):
-                    constraint_queue.append(cons)
-                    
+                for cons in csp.vars_to_cons[var]:
+                    if id(cons) not in in_queue:
+                        constraint_queue.append(cons)
+                        in_queue.add(id(cons))
+
+
     return True, pruned
 
 def ord_mrv(csp):
     ''' return variable according to the Minimum Remaining Values heuristic '''
-    #IMPLEMENT
-    
-    dom_count = math.inf 
-    mrv = csp.get_all_vars().pop(0)
-    
+
+    mrv = None
+    best = None
+
     for var in csp.get_all_vars():
-        count = 0
-        for val in var.cur_domain():
-            count += 1
-            
-        if count < dom_count:
-            dom_count = count
+        if var.is_assigned():
+            continue
+        size = var.cur_domain_size()
+        if best is None or size < best:
+            best = size
             mrv = var
-    
+            if best == 1: # no unassigned variable can do better
+                break
+
     return mrv
\ No newline at end of file